@@ -1,72 +1,196 @@
 from flask import Flask, jsonify, request
-from flask_cors import CORS
-from dotenv import load_dotenv
+from flask.json.provider import JSONProvider
+from werkzeug.exceptions import BadRequest, HTTPException
 import os
-import json
 import re
-import io
+import time
+import hashlib
+import threading
+import orjson
 import requests
-from PyPDF2 import PdfReader
-from llm_summarizer import LLMSummarizer
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import pypdfium2 as pdfium
+from lxml import etree
+from bs4 import BeautifulSoup
+from dotenv import load_dotenv
 
+# Load .env before the local modules below, since cache reads CACHE_DIR at import
 load_dotenv()
 
+from llm_summarizer import LLMSummarizer
+from image_generator import DALLE_URL_TTL, ImageGenerator
+from openai_client import get_client
+from cache import DEFAULT_CACHE_DIR as CACHE_DIR, DiskCache, LRUCache
+from middleware import CORSMiddleware, CompressionMiddleware
+
+# Environment-derived settings, read once at import rather than per request
+APP_VERSION = os.getenv("APP_VERSION", "0.1.0")
+CORS_ORIGIN = os.getenv("CORS_ORIGIN", "*")
+PORT = int(os.getenv("PORT", "5175"))
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "20"))
+FLASK_DEBUG = os.getenv("FLASK_DEBUG") == "1"
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+
+class ORJSONProvider(JSONProvider):
+    """JSON provider backed by orjson, used by jsonify() and error responses"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Build the body as bytes directly instead of going through dumps() -> str
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype="application/json")
+
+
 app = Flask(__name__)
-# Allow all origins for deployment (you can restrict this in production if needed)
-CORS(app, resources={r"/*": {"origins": "*", "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"], "allow_headers": ["Content-Type", "Authorization"]}})
+app.json = ORJSONProvider(app)
+
+# Allow all origins by default; set CORS_ORIGIN to restrict it in production.
+# CORS sits outermost so preflights return before compression is considered
+app.wsgi_app = CORSMiddleware(CompressionMiddleware(app.wsgi_app), CORS_ORIGIN)
+
+# Configure max file size (20MB by default)
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_MB * 1024 * 1024
+
 
-# Configure max file size (20MB)
-app.config['MAX_CONTENT_LENGTH'] = 20 * 1024 * 1024
+def _json_body():
+    """Decode the JSON request body once, without Werkzeug caching the raw bytes"""
+    raw = request.get_data(cache=False)
+    if not raw:
+        return None
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        raise BadRequest("Request body is not valid JSON")
 
 
 # ============================================================================
 # Health & Info Routes
 # ============================================================================
 
+def _static_body(obj):
+    """Serialize a fixed payload once, returning (body, etag)"""
+    body = orjson.dumps(obj)
+    return body, hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+def _static_json(static):
+    """Serve a prebuilt body; a matching If-None-Match short-circuits to 304"""
+    body, etag = static
+    # A fresh Response per request, since after_request hooks may mutate headers
+    resp = app.response_class(body, mimetype="application/json")
+    resp.set_etag(etag)
+    return resp.make_conditional(request)
+
+
+# These payloads are fixed for the process lifetime, so build them at import
+_HEALTH = _static_body({"ok": True, "service": "paperbuddy-server"})
+_VERSION = _static_body({"version": APP_VERSION})
+# _INFO is built at the bottom of the module, after all routes exist
+
+
 @app.get("/api/health")
 def health():
-    return jsonify({"ok": True, "service": "paperbuddy-server"})
+    return _static_json(_HEALTH)
+
+
+@app.get("/api/warmup")
+def warmup():
+    """
+    Prime per-process state so the first real request doesn't pay for it.
+    Meant to be hit once per worker at boot (e.g. by a deploy hook).
+    """
+    if OPENAI_API_KEY:
+        get_client(OPENAI_API_KEY)
+    # First FreeType render and PNG encode of the placeholder pipeline
+    ImageGenerator()._gen_placeholder("PaperBuddy", "pastel", 0)
+    return jsonify({"ok": True})
 
 
 @app.get("/api/version")
 def version():
-    return jsonify({"version": os.getenv("APP_VERSION", "0.1.0")})
+    return _static_json(_VERSION)
 
 
 @app.get("/api/info")
 def info():
-    return jsonify({
-        "name": "PaperBuddy API",
-        "description": "Lightweight API for summarizing papers in a kid-friendly way.",
-        "endpoints": [
-            "/api/health",
-            "/api/version",
-            "/api/info",
-            "/api/parse/pdf",
-            "/api/parse/url",
-            "/api/parse/manual",
-            "/api/summarize",
-            "/api/images/generate"
-        ],
-    })
+    return _static_json(_INFO)
 
 
 # ============================================================================
 # MODULE A: PDF/Manual Input Parsing (Person 1)
 # ============================================================================
 
-def extract_text_from_pdf(pdf_reader):
+def extract_text_from_pdf(pdf):
     """Extract all text from PDF pages"""
-    text = ""
-    for page in pdf_reader.pages:
-        text += page.extract_text() + "\n"
-    return text
+    # One join at the end instead of re-copying the growing string per page.
+    # PDFium ends lines with \r\n; normalise so parse_paper_structure sees \n
+    return "".join(
+        page.get_textpage().get_text_range().replace("\r\n", "\n") + "\n"
+        for page in pdf
+    )
+
+
+# Parsed PDFs keyed by content hash, so re-uploads of the same file skip
+# parsing. The disk layer outlives restarts and is shared across workers
+_PDF_CACHE = LRUCache(maxsize=128)
+# A parsed paper can run to ~200 KB of section text, so fewer are kept on disk
+_PDF_DISK_CACHE = DiskCache(os.path.join(CACHE_DIR, "pdf"), ttl=24 * 3600, max_entries=500)
+
+
+# PDFium is not thread-safe and pypdfium2 does not serialize calls into it.
+# Gevent workers run one OS thread, but the threaded dev server (python app.py)
+# can parse two uploads at once, so every PDFium call goes through this lock
+_PDFIUM_LOCK = threading.Lock()
+
+
+def _pdf_text(stream):
+    """Open, extract and close a PDF under the PDFium lock"""
+    with _PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(stream)
+        try:
+            return extract_text_from_pdf(pdf)
+        finally:
+            # Also closes the page and text-page handles, while still locked
+            pdf.close()
+
+
+def _file_digest(stream):
+    """Hash an upload stream in chunks without reading it into memory"""
+    digest = hashlib.file_digest(stream, "sha256")
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+# Common section headings (optionally numbered) or all-caps headings, as one
+# alternation so each line costs a single match
+_SECTION_RE = re.compile(
+    r'^(?:\d+\.?\s*)?(?:Introduction|Abstract|Background|Related Work|Method|Methodology|Methods|Approach|Implementation|Results|Evaluation|Discussion|Conclusion|References|Acknowledgments?)$'
+    r'|^[A-Z][A-Z\s]+$',
+    re.IGNORECASE
+)
+_ABSTRACT_RE = re.compile(r'^Abstract\s*:?$', re.IGNORECASE)
+_AUTHOR_SPLIT_RE = re.compile(r',\s*and\s*|,\s*|\s+and\s+')
+# Upper bound on non-empty lines scanned by parse_paper_structure
+_MAX_STRUCTURE_LINES = 5000
+# Per-section content cap, the same limit parse_manual applies to user input
+_MAX_SECTION_CHARS = 10000
+# Words that mark a line as affiliation/heading text rather than author names
+_AUTHOR_STOPWORDS = ('abstract', 'introduction', 'university', 'department')
 
 
 def parse_paper_structure(text):
     """Parse paper text into structured format"""
     lines = text.split('\n')
     lines = [line.strip() for line in lines if line.strip()]
+    # Structure lives near the front; bound the work for very long papers
+    lines = lines[:_MAX_STRUCTURE_LINES]
     
     # Try to extract title (usually first non-empty line or from metadata)
     title = ""
@@ -74,19 +198,19 @@ def parse_paper_structure(text):
     abstract = ""
     sections = []
     
-    # Common section headings patterns
-    section_patterns = [
-        r'^\d+\.?\s*(Introduction|Abstract|Background|Related Work|Method|Methodology|Methods|Approach|Implementation|Results|Evaluation|Discussion|Conclusion|References|Acknowledgments?)$',
-        r'^(Introduction|Abstract|Background|Related Work|Method|Methodology|Methods|Approach|Implementation|Results|Evaluation|Discussion|Conclusion|References|Acknowledgments?)$',
-        r'^[A-Z][A-Z\s]+$'  # All caps headings
-    ]
-    
     current_section = None
     current_content = []
+    current_len = 0
     in_abstract = False
     abstract_started = False
     
     for i, line in enumerate(lines):
+        # Only the first 20 sections are returned; once they are complete and
+        # the front matter is found, stop (a stray "Abstract" heading deep in
+        # the body no longer gets appended to the abstract)
+        if len(sections) >= 20 and title and authors and abstract and not in_abstract:
+            break
+        
         # Try to identify title (usually first few lines, longer than 10 chars)
         if not title and len(line) > 10 and len(line) < 200:
             # Skip common prefixes
@@ -95,26 +219,28 @@ def parse_paper_structure(text):
                 continue
         
         # Try to identify authors (lines with "and" or commas, before abstract)
-        if not authors and ('and' in line.lower() or ',' in line) and len(line) < 300:
+        low = line.lower()
+        if not authors and ('and' in low or ',' in line) and len(line) < 300:
             # Check if it looks like author names
-            if any(keyword not in line.lower() for keyword in ['abstract', 'introduction', 'university', 'department']):
-                author_candidates = re.split(r',\s*and\s*|,\s*|\s+and\s+', line)
+            if not any(keyword in low for keyword in _AUTHOR_STOPWORDS):
+                author_candidates = _AUTHOR_SPLIT_RE.split(line)
                 if len(author_candidates) >= 1:
                     authors = [a.strip() for a in author_candidates if a.strip() and len(a.strip()) > 2]
                     if authors:
                         continue
         
         # Identify abstract section
-        if re.match(r'^Abstract\s*:?$', line, re.IGNORECASE):
+        if _ABSTRACT_RE.match(line):
             in_abstract = True
             abstract_started = True
             continue
         
+        is_section_heading = _SECTION_RE.match(line) is not None
+
         # Collect abstract content
         if in_abstract:
             # Check if we've hit a section heading (end of abstract)
-            is_section = any(re.match(pattern, line, re.IGNORECASE) for pattern in section_patterns)
-            if is_section and abstract_started and len(abstract) > 50:
+            if is_section_heading and abstract_started and len(abstract) > 50:
                 in_abstract = False
                 # Continue to process this line as a section heading
             else:
@@ -124,33 +250,31 @@ def parse_paper_structure(text):
                 continue
         
         # Identify section headings
-        is_section_heading = False
-        for pattern in section_patterns:
-            if re.match(pattern, line, re.IGNORECASE):
-                is_section_heading = True
-                break
-        
         if is_section_heading:
             # Save previous section
             if current_section and current_content:
                 sections.append({
                     "heading": current_section,
-                    "content": " ".join(current_content).strip()
+                    "content": " ".join(current_content)[:_MAX_SECTION_CHARS].strip()
                 })
             # Start new section
             current_section = line
             current_content = []
+            current_len = 0
         else:
             # Add to current section or create default
             if not current_section:
                 current_section = "Content"
-            current_content.append(line)
+            # Stop collecting once the section is past the content cap
+            if current_len < _MAX_SECTION_CHARS:
+                current_content.append(line)
+                current_len += len(line) + 1
     
     # Save last section
     if current_section and current_content:
         sections.append({
             "heading": current_section,
-            "content": " ".join(current_content).strip()
+            "content": " ".join(current_content)[:_MAX_SECTION_CHARS].strip()
         })
     
     # Fallback: if no sections found, create one with all content
@@ -208,45 +332,85 @@ def parse_pdf():
             "courseTopic": str
         }
     """
+    if "file" not in request.files:
+        return jsonify({"error": "No file provided"}), 400
+
+    file = request.files["file"]
+    course_topic = request.form.get("courseTopic", "CV")
+
+    # Validate file
+    if file.filename == "":
+        return jsonify({"error": "Empty filename"}), 400
+
+    if not file.filename.endswith(".pdf"):
+        return jsonify({"error": "File must be a PDF"}), 400
+
+    # Identical uploads return the previously parsed structure
+    file.stream.seek(0)
+    digest = _file_digest(file.stream)
+    cached = _PDF_CACHE.get(digest)
+    if cached is None:
+        cached = _PDF_DISK_CACHE.get(digest)
+        if cached is not None:
+            _PDF_CACHE.set(digest, cached)
+    if cached is not None:
+        response = jsonify({**cached, "courseTopic": course_topic})
+        response.headers["X-Cache"] = "HIT"
+        return response
+
+    # Read PDF file straight from the upload stream. Werkzeug already
+    # spools uploads over 500 KB to a temp file, so no in-memory copy
     try:
-        if "file" not in request.files:
-            return jsonify({"error": "No file provided"}), 400
+        try:
+            text = _pdf_text(file.stream)
+        except pdfium.PdfiumError as open_error:
+            # PDFium refuses to open files that need a user password
+            if getattr(open_error, "err_code", None) == pdfium.raw.FPDF_ERR_PASSWORD:
+                return jsonify({"error": "Encrypted PDF files are not supported"}), 400
+            raise
+        
+        if not text or len(text.strip()) < 50:
+            return jsonify({"error": "Could not extract text from PDF. The file might be scanned or corrupted."}), 400
+        
+        # Parse paper structure
+        paper_data = parse_paper_structure(text)
+        _PDF_CACHE.set(digest, paper_data)
+        _PDF_DISK_CACHE.set(digest, paper_data)
 
-        file = request.files["file"]
-        course_topic = request.form.get("courseTopic", "CV")
+        response = jsonify({**paper_data, "courseTopic": course_topic})
+        response.headers["X-Cache"] = "MISS"
+        return response
+        
+    except Exception as pdf_error:
+        return jsonify({"error": f"Failed to parse PDF: {str(pdf_error)}"}), 400
 
-        # Validate file
-        if file.filename == "":
-            return jsonify({"error": "Empty filename"}), 400
 
-        if not file.filename.endswith(".pdf"):
-            return jsonify({"error": "File must be a PDF"}), 400
+# One pooled session for arXiv/ACM fetches so keep-alive connections are reused
+_HTTP = requests.Session()
+_HTTP_ADAPTER = HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[429, 500, 502, 503, 504]),
+)
+_HTTP.mount("http://", _HTTP_ADAPTER)
+_HTTP.mount("https://", _HTTP_ADAPTER)
 
-        # Read PDF file
-        try:
-            pdf_reader = PdfReader(io.BytesIO(file.read()))
-            
-            # Check if PDF is encrypted
-            if pdf_reader.is_encrypted:
-                return jsonify({"error": "Encrypted PDF files are not supported"}), 400
-            
-            # Extract text from PDF
-            text = extract_text_from_pdf(pdf_reader)
-            
-            if not text or len(text.strip()) < 50:
-                return jsonify({"error": "Could not extract text from PDF. The file might be scanned or corrupted."}), 400
-            
-            # Parse paper structure
-            paper_data = parse_paper_structure(text)
-            paper_data["courseTopic"] = course_topic
-            
-            return jsonify(paper_data)
-            
-        except Exception as pdf_error:
-            return jsonify({"error": f"Failed to parse PDF: {str(pdf_error)}"}), 400
 
-    except Exception as e:
-        return jsonify({"error": f"PDF parsing failed: {str(e)}"}), 500
+# arXiv metadata rarely changes, so API responses are kept for two days;
+# whole /api/parse/url results are kept for one
+_ARXIV_CACHE = DiskCache(os.path.join(CACHE_DIR, "arxiv"), ttl=48 * 3600)
+_URL_CACHE = DiskCache(os.path.join(CACHE_DIR, "url"), ttl=24 * 3600)
+
+
+# Atom feed parsing for the arXiv API. Entity expansion and network access
+# are off since the document comes from a remote server
+_ATOM_NS = {'atom': 'http://www.w3.org/2005/Atom'}
+_ATOM_PARSER = etree.XMLParser(resolve_entities=False, no_network=True)
+
+
+def _sha256(text):
+    """Hex SHA-256 of a string, used as a cache file name"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 
 def fetch_arxiv_metadata(arxiv_id):
@@ -254,40 +418,42 @@ def fetch_arxiv_metadata(arxiv_id):
     try:
         # Remove 'arxiv:' prefix if present
         arxiv_id = arxiv_id.replace('arxiv:', '').replace('arXiv:', '').strip()
+        cache_key = _sha256(arxiv_id)
+        cached = _ARXIV_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
         
         # Try different URL formats
         api_url = f"http://export.arxiv.org/api/query?id_list={arxiv_id}"
-        response = requests.get(api_url, timeout=10)
+        response = _HTTP.get(api_url, timeout=10)
         response.raise_for_status()
         
         # Parse XML response
-        from xml.etree import ElementTree as ET
-        root = ET.fromstring(response.content)
-        
-        # Namespace
-        ns = {'atom': 'http://www.w3.org/2005/Atom'}
+        root = etree.fromstring(response.content, parser=_ATOM_PARSER)
         
-        entry = root.find('atom:entry', ns)
+        entry = root.find('atom:entry', _ATOM_NS)
         if entry is None:
             return None
         
-        title = entry.find('atom:title', ns)
-        title_text = title.text.strip().replace('\n', ' ') if title is not None else "Untitled"
+        title = entry.findtext('atom:title', namespaces=_ATOM_NS)
+        title_text = title.strip().replace('\n', ' ') if title is not None else "Untitled"
         
         authors = []
-        for author in entry.findall('atom:author', ns):
-            name = author.find('atom:name', ns)
+        for author in entry.iterfind('atom:author', _ATOM_NS):
+            name = author.findtext('atom:name', namespaces=_ATOM_NS)
             if name is not None:
-                authors.append(name.text.strip())
+                authors.append(name.strip())
         
-        summary = entry.find('atom:summary', ns)
-        abstract_text = summary.text.strip().replace('\n', ' ') if summary is not None else ""
+        summary = entry.findtext('atom:summary', namespaces=_ATOM_NS)
+        abstract_text = summary.strip().replace('\n', ' ') if summary is not None else ""
         
-        return {
+        metadata = {
             "title": title_text,
             "authors": authors,
             "abstract": abstract_text
         }
+        _ARXIV_CACHE.set(cache_key, metadata)
+        return metadata
     except Exception as e:
         print(f"Error fetching arXiv metadata: {e}")
         return None
@@ -297,14 +463,13 @@ def fetch_acm_metadata(acm_url):
     """Fetch metadata from ACM Digital Library"""
     try:
         # ACM doesn't have a public API, so we'll try to extract from the page
-        response = requests.get(acm_url, timeout=10, headers={
+        response = _HTTP.get(acm_url, timeout=10, headers={
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
         response.raise_for_status()
         
         # Try to extract metadata from HTML
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = BeautifulSoup(response.content, 'lxml')
         
         title_elem = soup.find('h1', class_='citation__title') or soup.find('h1')
         title = title_elem.get_text(strip=True) if title_elem else "Untitled"
@@ -329,6 +494,10 @@ def fetch_acm_metadata(acm_url):
         return None
 
 
+# New-style (2101.00001) or old-style (cs/0112017) arXiv ids in abs/ and pdf/ URLs
+_ARXIV_ID_RE = re.compile(r'arxiv\.org/(?:abs|pdf)/([0-9]+\.[0-9]+|[a-z-]+\/[0-9]+)')
+
+
 @app.post("/api/parse/url")
 def parse_url():
     """
@@ -349,50 +518,61 @@ def parse_url():
             "courseTopic": str
         }
     """
-    try:
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({"error": "No data provided"}), 400
-        
-        url = data.get("url", "").strip()
-        course_topic = data.get("courseTopic", "CV")
-        
-        if not url:
-            return jsonify({"error": "URL is required"}), 400
-        
-        # Detect URL type
-        metadata = None
-        
-        if "arxiv.org" in url or "arxiv.org/abs/" in url or "arxiv.org/pdf/" in url:
-            # Extract arXiv ID
-            arxiv_id_match = re.search(r'arxiv\.org/(?:abs|pdf)/([0-9]+\.[0-9]+|[a-z-]+\/[0-9]+)', url)
-            if arxiv_id_match:
-                arxiv_id = arxiv_id_match.group(1)
-                metadata = fetch_arxiv_metadata(arxiv_id)
-            else:
-                return jsonify({"error": "Invalid arXiv URL format"}), 400
-        
-        elif "dl.acm.org" in url or "acm.org" in url:
-            metadata = fetch_acm_metadata(url)
-        
+    data = _json_body()
+    
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+    
+    url = (data.get("url") or "").strip()
+    course_topic = data.get("courseTopic", "CV")
+    
+    if not url:
+        return jsonify({"error": "URL is required"}), 400
+    
+    cache_key = _sha256(url)
+    cached = _URL_CACHE.get(cache_key)
+    if cached is not None:
+        response = jsonify({**cached, "courseTopic": course_topic})
+        response.headers["X-Cache"] = "HIT"
+        return response
+    
+    # Detect URL type
+    metadata = None
+    
+    if "arxiv.org" in url:
+        # Extract arXiv ID
+        arxiv_id_match = _ARXIV_ID_RE.search(url)
+        if arxiv_id_match:
+            arxiv_id = arxiv_id_match.group(1)
+            metadata = fetch_arxiv_metadata(arxiv_id)
         else:
-            return jsonify({"error": "Unsupported URL. Please provide an arXiv or ACM Digital Library URL."}), 400
-        
-        if not metadata:
-            return jsonify({"error": "Could not fetch metadata from URL"}), 400
-        
-        # Return standardized structure
-        return jsonify({
-            "title": metadata.get("title", "Untitled"),
-            "authors": metadata.get("authors", ["Unknown"]),
-            "abstract": metadata.get("abstract", "No abstract available."),
-            "sections": [],  # URL parsing doesn't extract sections
-            "courseTopic": course_topic
-        })
+            return jsonify({"error": "Invalid arXiv URL format"}), 400
+    
+    elif "acm.org" in url:
+        metadata = fetch_acm_metadata(url)
+    
+    else:
+        return jsonify({"error": "Unsupported URL. Please provide an arXiv or ACM Digital Library URL."}), 400
+    
+    if not metadata:
+        return jsonify({"error": "Could not fetch metadata from URL"}), 400
+    
+    # Return standardized structure
+    paper_data = {
+        "title": metadata.get("title", "Untitled"),
+        "authors": metadata.get("authors", ["Unknown"]),
+        "abstract": metadata.get("abstract", "No abstract available."),
+        "sections": [],  # URL parsing doesn't extract sections
+    }
+    _URL_CACHE.set(cache_key, paper_data)
 
-    except Exception as e:
-        return jsonify({"error": f"URL parsing failed: {str(e)}"}), 500
+    response = jsonify({**paper_data, "courseTopic": course_topic})
+    response.headers["X-Cache"] = "MISS"
+    return response
+
+
+# Splits a comma-separated author list, eating the whitespace around each comma
+_AUTHORS_CSV_RE = re.compile(r"\s*,\s*")
 
 
 @app.post("/api/parse/manual")
@@ -423,87 +603,94 @@ def parse_manual():
         3. Validate section format
         4. Return standardized structure
     """
-    try:
-        data = request.get_json()
-
-        if not data:
-            return jsonify({"error": "No data provided"}), 400
-
-        # Extract fields
-        title = data.get("title", "").strip()
-        authors_str = data.get("authors", "").strip()
-        abstract = data.get("abstract", "").strip()
-        sections = data.get("sections", [])
-        course_topic = data.get("courseTopic", "CV")
-
-        # Basic validation
-        if not title:
-            return jsonify({"error": "Title is required"}), 400
-        if not authors_str:
-            return jsonify({"error": "Authors are required"}), 400
-        if not abstract:
-            return jsonify({"error": "Abstract is required"}), 400
+    data = _json_body()
+
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+
+    paper, error = _validate_manual(data)
+    if error:
+        return jsonify({"error": error}), 400
+    return jsonify(paper)
+
+
+def _validate_manual(data):
+    """Validate a manual-input payload, returning (paper, None) or (None, error)"""
+    # Extract fields
+    title = (data.get("title") or "").strip()
+    authors_str = (data.get("authors") or "").strip()
+    abstract = (data.get("abstract") or "").strip()
+    sections = data.get("sections") or []
+    course_topic = data.get("courseTopic", "CV")
+
+    # Basic validation
+    if not title:
+        return None, "Title is required"
+    if not authors_str:
+        return None, "Authors are required"
+    if not abstract:
+        return None, "Abstract is required"
 
-        # Enhanced validation
-        if len(title) > 500:
-            return jsonify({"error": "Title is too long (max 500 characters)"}), 400
-        
-        if len(abstract) > 5000:
-            return jsonify({"error": "Abstract is too long (max 5000 characters)"}), 400
-        
-        if len(abstract) < 50:
-            return jsonify({"error": "Abstract is too short (min 50 characters)"}), 400
+    # Enhanced validation
+    if len(title) > 500:
+        return None, "Title is too long (max 500 characters)"
+    
+    if len(abstract) > 5000:
+        return None, "Abstract is too long (max 5000 characters)"
+    
+    if len(abstract) < 50:
+        return None, "Abstract is too short (min 50 characters)"
 
-        # Parse authors
-        authors = [a.strip() for a in authors_str.split(",") if a.strip()]
+    # Parse authors
+    authors = [a for a in _AUTHORS_CSV_RE.split(authors_str) if a]
 
-        if len(authors) == 0:
-            return jsonify({"error": "At least one author is required"}), 400
+    if len(authors) == 0:
+        return None, "At least one author is required"
+    
+    if len(authors) > 20:
+        return None, "Too many authors (max 20)"
+    
+    # Validate author names
+    for author in authors:
+        if len(author) < 2:
+            return None, "Author names must be at least 2 characters"
+        if len(author) > 100:
+            return None, f"Author name too long: {author}"
+
+    # Validate and clean sections
+    if not isinstance(sections, list):
+        return None, "Sections must be a list"
+
+    valid_sections = []
+    for s in sections:
+        if not isinstance(s, dict):
+            continue
         
-        if len(authors) > 20:
-            return jsonify({"error": "Too many authors (max 20)"}), 400
+        heading = (s.get("heading") or "").strip()
+        content = (s.get("content") or "").strip()
         
-        # Validate author names
-        for author in authors:
-            if len(author) < 2:
-                return jsonify({"error": "Author names must be at least 2 characters"}), 400
-            if len(author) > 100:
-                return jsonify({"error": f"Author name too long: {author}"}), 400
-
-        # Validate and clean sections
-        valid_sections = []
-        for s in sections:
-            if not isinstance(s, dict):
-                continue
-            
-            heading = s.get("heading", "").strip()
-            content = s.get("content", "").strip()
+        if heading or content:
+            if len(heading) > 200:
+                heading = heading[:200]
+            if len(content) > 10000:
+                content = content[:10000]
             
-            if heading or content:
-                if len(heading) > 200:
-                    heading = heading[:200]
-                if len(content) > 10000:
-                    content = content[:10000]
-                
-                valid_sections.append({
-                    "heading": heading or "Untitled Section",
-                    "content": content
-                })
-        
-        # Limit sections
-        valid_sections = valid_sections[:30]
-
-        # Return standardized structure
-        return jsonify({
-            "title": title,
-            "authors": authors,
-            "abstract": abstract,
-            "sections": valid_sections,
-            "courseTopic": course_topic
-        })
+            valid_sections.append({
+                "heading": heading or "Untitled Section",
+                "content": content
+            })
+    
+    # Limit sections
+    valid_sections = valid_sections[:30]
 
-    except Exception as e:
-        return jsonify({"error": f"Manual input validation failed: {str(e)}"}), 500
+    # Return standardized structure
+    return {
+        "title": title,
+        "authors": authors,
+        "abstract": abstract,
+        "sections": valid_sections,
+        "courseTopic": course_topic
+    }, None
 
 
 # ============================================================================
@@ -555,42 +742,95 @@ def summarize():
         6. Handle errors/retries
         7. Return structured summary
     """
-    try:
-        data = request.get_json()
+    data = _json_body()
 
-        if not data:
-            return jsonify({"error": "No paper data provided"}), 400
+    if not data:
+        return jsonify({"error": "No paper data provided"}), 400
 
-        # Extract paper data
-        title = data.get("title", "")
-        authors = data.get("authors", [])
-        abstract = data.get("abstract", "")
-        sections = data.get("sections", [])
-        course_topic = data.get("courseTopic", "CV")
+    summary, error = _summarize_paper(data)
+    if error:
+        return jsonify({"error": error}), 400
+    return jsonify(summary)
 
-        if not title or not abstract:
-            return jsonify({"error": "Title and abstract are required"}), 400
 
-        # Use LLMSummarizer to generate kid-friendly summary
-        summarizer = LLMSummarizer(backend="openai")
-        summary = summarizer.summarize(
-            title=title,
-            authors=authors,
-            abstract=abstract,
-            sections=sections,
-            course_topic=course_topic
-        )
+def _summarize_paper(data):
+    """Summarize a parsed paper, returning (summary, None) or (None, error)"""
+    # Extract paper data
+    title = data.get("title", "")
+    authors = data.get("authors", [])
+    abstract = data.get("abstract", "")
+    sections = data.get("sections", [])
+    course_topic = data.get("courseTopic", "CV")
 
-        return jsonify(summary)
+    if not title or not abstract:
+        return None, "Title and abstract are required"
 
-    except Exception as e:
-        return jsonify({"error": f"Summarization failed: {str(e)}"}), 500
+    # Use LLMSummarizer to generate kid-friendly summary
+    summarizer = LLMSummarizer(backend="openai", api_key=OPENAI_API_KEY)
+    summary = summarizer.summarize(
+        title=title,
+        authors=authors,
+        abstract=abstract,
+        sections=sections,
+        course_topic=course_topic
+    )
+
+    return summary, None
+
+
+@app.post("/api/summarize/stream")
+def summarize_stream():
+    """
+    Module B - Stream the summary as Server-Sent Events
+
+    Input (JSON): same as /api/summarize
+
+    Output (text/event-stream):
+        data: {"delta": str}      # raw JSON text as the LLM writes it (0..n events)
+        data: {"summary": {...}}  # final validated summary, same shape as /api/summarize
+    """
+    data = _json_body()
+
+    if not data:
+        return jsonify({"error": "No paper data provided"}), 400
+
+    title = data.get("title", "")
+    abstract = data.get("abstract", "")
+
+    if not title or not abstract:
+        return jsonify({"error": "Title and abstract are required"}), 400
+
+    summarizer = LLMSummarizer(backend="openai", api_key=OPENAI_API_KEY)
+    events = summarizer.summarize_stream(
+        title=title,
+        authors=data.get("authors", []),
+        abstract=abstract,
+        sections=data.get("sections", []),
+        course_topic=data.get("courseTopic", "CV")
+    )
+
+    def generate():
+        for event in events:
+            yield b"data: " + orjson.dumps(event) + b"\n\n"
+
+    # X-Accel-Buffering stops nginx from holding events back until the end
+    return app.response_class(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 # ============================================================================
 # MODULE C: Image Generation (Person 3)
 # ============================================================================
 
+# Image sets keyed by (backend, style, key points). A DALL-E set expires when
+# its oldest URL leaves the DALLE_URL_TTL window, which may be sooner than the
+# default when some URLs came from the generator's own cache
+_IMAGE_CACHE = LRUCache(maxsize=64, ttl=DALLE_URL_TTL)
+
+
 @app.post("/api/images/generate")
 def generate_images():
     """
@@ -603,30 +843,78 @@ def generate_images():
     Input:  {"key_points": [str], "style": str}
     Output: {"images": [{url, description, key_point, backend}]}
     """
-    try:
-        from image_generator import ImageGenerator
+    data = _json_body()
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
 
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "No data provided"}), 400
+    key_points = data.get("key_points", [])
+    style = data.get("style", "pastel")
 
-        key_points = data.get("key_points", [])
-        style = data.get("style", "pastel")
+    if not key_points:
+        return jsonify({"error": "key_points are required"}), 400
 
-        if not key_points:
-            return jsonify({"error": "key_points are required"}), 400
+    result, hit = _images_for(key_points, style)
+    response = jsonify(result)
+    response.headers["X-Cache"] = "HIT" if hit else "MISS"
+    return response
 
-        # Determine backend: use OpenAI if key exists, otherwise placeholder
-        backend = "openai" if os.getenv("OPENAI_API_KEY") else "placeholder"
 
-        # Generate images
-        generator = ImageGenerator(backend=backend)
-        images = generator.generate_images(key_points, style, max_images=5)
+def _images_for(key_points, style):
+    """Return ({"images", "backend"}, cache_hit) for a set of key points"""
+    # Determine backend: use OpenAI if key exists, otherwise placeholder
+    backend = "openai" if OPENAI_API_KEY else "placeholder"
 
-        return jsonify({"images": images, "backend": backend})
+    cache_key = (backend, style, tuple(key_points))
+    images = _IMAGE_CACHE.get(cache_key)
+    if images is not None:
+        return {"images": images, "backend": backend}, True
 
-    except Exception as e:
-        return jsonify({"error": f"Image generation failed: {str(e)}"}), 500
+    # Generate images
+    generator = ImageGenerator(backend=backend, api_key=OPENAI_API_KEY)
+    images = generator.generate_images(key_points, style, max_images=5)
+
+    # Generation times stay out of responses; only the oldest one matters here
+    now = time.time()
+    oldest = min((img.pop("created", now) for img in images), default=now)
+    ttl = DALLE_URL_TTL - (now - oldest)
+
+    # Don't keep a set where an image fell back to a placeholder after an error
+    if ttl > 0 and all(img["backend"] == backend for img in images):
+        _IMAGE_CACHE.set(cache_key, images, ttl=ttl)
+
+    return {"images": images, "backend": backend}, False
+
+
+# ============================================================================
+# Full Pipeline
+# ============================================================================
+
+@app.post("/api/pipeline")
+def pipeline():
+    """
+    Manual input -> parse -> summarize -> images in one round trip
+
+    Input:  {"manual": <same as /api/parse/manual>, "style": str}
+    Output: {"parse": {...}, "summary": {...}, "images": {images, backend}}
+            each shaped like the matching single-step endpoint's output.
+            A failed step returns 400 with {"error": str, "step": "parse" | "summarize"}
+    """
+    data = _json_body()
+    if not data or not isinstance(data.get("manual"), dict):
+        return jsonify({"error": "manual input is required"}), 400
+
+    paper, error = _validate_manual(data["manual"])
+    if error:
+        return jsonify({"error": error, "step": "parse"}), 400
+
+    summary, error = _summarize_paper(paper)
+    if error:
+        return jsonify({"error": error, "step": "summarize"}), 400
+
+    # Illustrate the summary's steps, as the client does after /api/summarize
+    images, _ = _images_for(summary.get("steps") or [paper["title"]], data.get("style", "pastel"))
+
+    return jsonify({"parse": paper, "summary": summary, "images": images})
 
 
 # ============================================================================
@@ -640,7 +928,43 @@ def not_found(_):
 
 @app.errorhandler(413)
 def file_too_large(_):
-    return jsonify({"error": "File too large. Maximum size is 20MB"}), 413
+    return jsonify({"error": f"File too large. Maximum size is {MAX_UPLOAD_MB}MB"}), 413
+
+
+# Prefixes for unexpected failures, keyed by the view that raised them
+_ERROR_PREFIXES = {
+    "parse_pdf": "PDF parsing failed",
+    "parse_url": "URL parsing failed",
+    "parse_manual": "Manual input validation failed",
+    "summarize": "Summarization failed",
+    "generate_images": "Image generation failed",
+    "pipeline": "Pipeline failed",
+}
+
+
+@app.errorhandler(Exception)
+def unhandled_error(e):
+    # Other HTTP errors (400 bad JSON, 405, ...) keep their own status code
+    if isinstance(e, HTTPException):
+        return jsonify({"error": e.description}), e.code
+
+    app.logger.exception("Unhandled error in %s", request.endpoint)
+    prefix = _ERROR_PREFIXES.get(request.endpoint, "Request failed")
+    return jsonify({"error": f"{prefix}: {str(e)}"}), 500
+
+
+# ============================================================================
+# Static Payloads
+# ============================================================================
+
+# Built once every route is registered, so the endpoint list tracks app.url_map
+_INFO = _static_body({
+    "name": "PaperBuddy API",
+    "description": "Lightweight API for summarizing papers in a kid-friendly way.",
+    "endpoints": list(dict.fromkeys(
+        rule.rule for rule in app.url_map.iter_rules() if rule.rule.startswith("/api/")
+    )),
+})
 
 
 # ============================================================================
@@ -648,5 +972,5 @@ def file_too_large(_):
 # ============================================================================
 
 if __name__ == "__main__":
-    port = int(os.getenv("PORT", "5175"))
-    app.run(host="0.0.0.0", port=port, debug=True)
\ No newline at end of file
+    # Development server only; production runs under gunicorn (see wsgi.py)
+    app.run(host="0.0.0.0", port=PORT, debug=FLASK_DEBUG)
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""
+Caches
+
+Small thread-safe LRU used to short-circuit repeated work (identical PDF
+uploads, repeat requests) inside a single worker process, plus a JSON file
+cache that survives restarts, is shared by every worker on the host, and
+prunes itself to a bounded number of unexpired files.
+"""
+
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import orjson
+
+# Root for on-disk caches; each user keeps its own subfolder
+DEFAULT_CACHE_DIR = os.getenv(
+    "CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+)
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with an optional entry lifetime."""
+
+    def __init__(self, maxsize=128, ttl=None):
+        """
+        Initialize cache.
+
+        Args:
+            maxsize: Maximum number of entries kept before evicting the oldest
+            ttl: Seconds an entry stays valid (None = until evicted)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default on a miss."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Store value under key, evicting the least recently used entry.
+
+        Args:
+            ttl: Lifetime for this entry only, overriding the cache's ttl
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+class DiskCache:
+    """
+    JSON-file cache keyed by hex digest, expiring entries by file age.
+
+    Stale files are deleted when read, and a sweep on the first write and
+    every sweep_every writes after it removes every expired file, then the
+    oldest ones beyond max_entries. The folder therefore stays bounded even
+    when most keys are never requested twice.
+    """
+
+    def __init__(self, directory, ttl, max_entries=1000, sweep_every=64):
+        """
+        Initialize cache.
+
+        Args:
+            directory: Folder holding one <key>.json file per entry
+            ttl: Seconds an entry stays valid, measured from its write time
+            max_entries: Files kept after a sweep, newest first
+            sweep_every: Writes between sweeps in this process
+        """
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.sweep_every = sweep_every
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or stale."""
+        path = self.directory / f"{key}.json"
+        try:
+            if time.time() - path.stat().st_mtime >= self.ttl:
+                _unlink_quietly(path)
+                return default
+            return orjson.loads(path.read_bytes())
+        except (OSError, orjson.JSONDecodeError):
+            return default
+
+    def set(self, key, value):
+        """Store value under key. Failures are ignored; the cache is best effort."""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Write then rename so concurrent readers never see a partial file
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(orjson.dumps(value))
+            os.replace(tmp, self.directory / f"{key}.json")
+        except OSError:
+            _unlink_quietly(tmp)
+            return
+
+        with self._lock:
+            self._writes += 1
+            sweep = (self._writes - 1) % self.sweep_every == 0
+        if sweep:
+            self.prune()
+
+    def prune(self):
+        """Delete expired entries, then the oldest ones beyond max_entries."""
+        now = time.time()
+        live = []
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                mtime = entry.stat().st_mtime
+            except OSError:
+                continue
+            # Temp files left by a crashed writer age out the same way
+            if now - mtime >= self.ttl:
+                _unlink_quietly(entry.path)
+            elif entry.name.endswith(".json"):
+                live.append((mtime, entry.path))
+
+        if len(live) > self.max_entries:
+            live.sort()
+            for _, path in live[:len(live) - self.max_entries]:
+                _unlink_quietly(path)
+
+
+def _unlink_quietly(path):
+    """Remove a file, ignoring ones another worker already removed."""
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
@@ -0,0 +1,14 @@
+"""Gunicorn settings for the PaperBuddy API (see wsgi.py)."""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5175')}"
+
+# Cooperative workers: each one multiplexes many in-flight LLM/image calls
+worker_class = "gevent"
+worker_connections = 1000
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+
+# LLM summaries can take close to a minute with retries
+timeout = 120
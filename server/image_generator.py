@@ -9,21 +9,69 @@ Falls back to placeholder images when API key is unavailable.
 import os
 import base64
 import io
-from PIL import Image, ImageDraw, ImageFont
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from PIL import Image, ImageColor, ImageDraw, ImageFont
+
+from cache import DEFAULT_CACHE_DIR, DiskCache
+from openai_client import get_client
+
+# DALL-E image URLs expire after about an hour; treat them as usable for 45 min
+# from generation. Callers that cache image sets must stay inside this window
+DALLE_URL_TTL = 45 * 60
+
+# {"url", "created"} keyed by model + prompt, so any worker reuses a paid generation
+_DALLE_CACHE = DiskCache(os.path.join(DEFAULT_CACHE_DIR, "images"), ttl=DALLE_URL_TTL)
+_DALLE_MODEL = "dall-e-3"
+
+# Placeholder fonts, parsed once per process instead of once per image
+try:
+    _FONT_LARGE = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 32)
+    _FONT_SMALL = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 18)
+except OSError:
+    _FONT_LARGE = _FONT_SMALL = ImageFont.load_default()
+
+
+# Keywords that indicate good visualization candidates. Matched as substrings
+# of the lowered key point, so 'model' also scores 'models'
+_VISUAL_KEYWORDS = (
+    # Processes and mechanisms
+    'process', 'mechanism', 'workflow', 'pipeline', 'system',
+    'architecture', 'framework', 'structure', 'model',
+    # Actions and transformations
+    'how', 'works', 'transforms', 'converts', 'generates',
+    'analyzes', 'processes', 'computes', 'calculates',
+    # Relationships and comparisons
+    'relationship', 'interaction', 'between', 'compared',
+    'versus', 'difference', 'connection', 'flow',
+    # Complex concepts
+    'algorithm', 'method', 'approach', 'technique', 'strategy'
+)
+
+# Keywords that indicate less visual concepts
+_NON_VISUAL_KEYWORDS = (
+    'results show', 'conclusion', 'found that', 'demonstrates',
+    'percentage', 'number of', 'statistics', 'data shows',
+    'proved', 'confirmed', 'validated'
+)
 
 
 class ImageGenerator:
     """Generates clear, professional illustrations for academic paper concepts."""
 
-    def __init__(self, backend="placeholder"):
+    def __init__(self, backend="placeholder", api_key=None):
         """
         Initialize image generator.
 
         Args:
             backend: "placeholder" or "openai"
+            api_key: OpenAI API key, read once by the caller (app.py passes
+                its import-time OPENAI_API_KEY); None means placeholders
         """
         self.backend = backend
-        self.openai_key = os.getenv("OPENAI_API_KEY")
+        self.openai_key = api_key
 
     def generate_images(self, key_points, style="pastel", max_images=5):
         """
@@ -39,20 +87,25 @@ class ImageGenerator:
         """
         # Intelligently select concepts that benefit most from visualization
         selected_points = self._select_visualizable_concepts(key_points, max_images)
-        images = []
+        n = len(selected_points)
 
-        for i, point in enumerate(selected_points):
-            try:
-                if self.backend == "openai" and self.openai_key:
-                    img = self._gen_openai(point, style)
-                else:
-                    img = self._gen_placeholder(point, style, i)
-                images.append(img)
-            except Exception as e:
-                print(f"Image generation failed for '{point}': {e}")
-                images.append(self._gen_placeholder(point, style, i, error=True))
+        if self.backend == "openai" and self.openai_key and n > 1:
+            # Each DALL-E call is a multi-second network wait, so overlap them;
+            # map() keeps results in key-point order
+            with ThreadPoolExecutor(max_workers=n) as pool:
+                return list(pool.map(self._gen_one, selected_points, [style] * n, range(n)))
 
-        return images
+        return [self._gen_one(point, style, i) for i, point in enumerate(selected_points)]
+
+    def _gen_one(self, point, style, idx):
+        """Generate one image, falling back to a placeholder on failure."""
+        try:
+            if self.backend == "openai" and self.openai_key:
+                return self._gen_openai(point, style)
+            return self._gen_placeholder(point, style, idx)
+        except Exception as e:
+            print(f"Image generation failed for '{point}': {e}")
+            return self._gen_placeholder(point, style, idx, error=True)
 
     def _select_visualizable_concepts(self, key_points, max_images):
         """
@@ -70,36 +123,14 @@ class ImageGenerator:
         - Pure statistics or numbers
         - Abstract conclusions
         """
-        # Keywords that indicate good visualization candidates
-        visual_keywords = [
-            # Processes and mechanisms
-            'process', 'mechanism', 'workflow', 'pipeline', 'system',
-            'architecture', 'framework', 'structure', 'model',
-            # Actions and transformations
-            'how', 'works', 'transforms', 'converts', 'generates',
-            'analyzes', 'processes', 'computes', 'calculates',
-            # Relationships and comparisons
-            'relationship', 'interaction', 'between', 'compared',
-            'versus', 'difference', 'connection', 'flow',
-            # Complex concepts
-            'algorithm', 'method', 'approach', 'technique', 'strategy'
-        ]
-
-        # Keywords that indicate less visual concepts
-        non_visual_keywords = [
-            'results show', 'conclusion', 'found that', 'demonstrates',
-            'percentage', 'number of', 'statistics', 'data shows',
-            'proved', 'confirmed', 'validated'
-        ]
-
         # Score each key point
         scored_points = []
         for point in key_points:
             point_lower = point.lower()
 
             # Calculate visual score
-            visual_score = sum(1 for kw in visual_keywords if kw in point_lower)
-            non_visual_penalty = sum(1 for kw in non_visual_keywords if kw in point_lower)
+            visual_score = sum(1 for kw in _VISUAL_KEYWORDS if kw in point_lower)
+            non_visual_penalty = sum(1 for kw in _NON_VISUAL_KEYWORDS if kw in point_lower)
 
             # Longer, more detailed points are often better for visualization
             length_bonus = min(len(point.split()) / 20, 1.0)
@@ -142,6 +173,7 @@ class ImageGenerator:
             selected = [point for _, point in worthy_points[:num_to_select]]
 
         # Maintain original order for consistency
+        selected = set(selected)
         result = [p for p in key_points if p in selected]
 
         print(f"Selected {len(result)} out of {len(key_points)} concepts for visualization")
@@ -160,44 +192,7 @@ class ImageGenerator:
         palette = colors.get(style, colors["pastel"])
         bg, fg = palette[idx % len(palette)]
 
-        # Create image
-        img = Image.new('RGB', (512, 512), bg)
-        draw = ImageDraw.Draw(img)
-
-        # Load fonts
-        try:
-            font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 32)
-            small = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 18)
-        except:
-            font = small = ImageFont.load_default()
-
-        # Word wrap text
-        words = point.split()
-        lines, current = [], []
-        for word in words:
-            current.append(word)
-            if draw.textbbox((0, 0), ' '.join(current), font=font)[2] > 452:
-                current.pop()
-                if current:
-                    lines.append(' '.join(current))
-                current = [word]
-        if current:
-            lines.append(' '.join(current))
-
-        # Draw centered text
-        y = (512 - len(lines) * 40) // 2
-        for line in lines:
-            w = draw.textbbox((0, 0), line, font=font)[2]
-            draw.text(((512 - w) // 2, y), line, fill=fg, font=font)
-            y += 45
-
-        # Add watermark
-        draw.text((10, 484), "PaperBuddy", fill=fg, font=small)
-
-        # Convert to base64
-        buf = io.BytesIO()
-        img.save(buf, format='PNG')
-        b64 = base64.b64encode(buf.getvalue()).decode()
+        b64 = _placeholder_png_b64(point, bg, fg)
 
         return {
             "url": f"data:image/png;base64,{b64}",
@@ -208,24 +203,32 @@ class ImageGenerator:
 
     def _gen_openai(self, point, style):
         """Generate image using OpenAI DALL-E 3."""
-        import openai
-
         prompt = self._build_prompt(point, style)
-        client = openai.OpenAI(api_key=self.openai_key)
-
-        response = client.images.generate(
-            model="dall-e-3",
-            prompt=prompt,
-            size="1024x1024",
-            quality="standard",
-            n=1
-        )
+        cache_key = hashlib.sha256(f"{_DALLE_MODEL}\x00{prompt}".encode("utf-8")).hexdigest()
+        entry = _DALLE_CACHE.get(cache_key)
 
+        if isinstance(entry, dict):
+            url, created = entry["url"], entry["created"]
+        else:
+            client = get_client(self.openai_key)
+            response = client.images.generate(
+                model=_DALLE_MODEL,
+                prompt=prompt,
+                size="1024x1024",
+                quality="standard",
+                n=1
+            )
+            url, created = response.data[0].url, time.time()
+            _DALLE_CACHE.set(cache_key, {"url": url, "created": created})
+
+        # "created" lets callers bound how long they keep the URL; it is
+        # stripped before the image reaches a response
         return {
-            "url": response.data[0].url,
+            "url": url,
             "description": point,
             "key_point": point,
-            "backend": "openai"
+            "backend": "openai",
+            "created": created
         }
 
     def _build_prompt(self, point, style):
@@ -243,3 +246,55 @@ class ImageGenerator:
             f"clean design, easy to understand, informative, high quality, "
             f"suitable for academic presentation"
         )
+
+
+@lru_cache(maxsize=512)
+def _placeholder_png_b64(point, bg, fg):
+    """Render a placeholder card as base64 PNG. Pure in its inputs, so memoized."""
+    # Create image. Text coverage is drawn into an 8-bit mask and colored by a
+    # bg -> fg palette ramp: same pixels as drawing in RGB, but the indexed PNG
+    # is about a third of the size and encodes faster
+    img = Image.new('L', (512, 512), 0)
+    draw = ImageDraw.Draw(img)
+
+    font, small = _FONT_LARGE, _FONT_SMALL
+
+    # Word wrap text, measuring each word once and keeping a running width;
+    # each line keeps its width so centering needs no second measurement
+    space_w = font.getlength(' ')
+    lines, current, line_w = [], [], 0
+    for word in point.split():
+        word_w = font.getlength(word)
+        if current and line_w + space_w + word_w > 452:
+            lines.append((' '.join(current), line_w))
+            current, line_w = [word], word_w
+        elif current:
+            current.append(word)
+            line_w += space_w + word_w
+        else:
+            current, line_w = [word], word_w
+    if current:
+        lines.append((' '.join(current), line_w))
+
+    # Draw centered text
+    y = (512 - len(lines) * 40) // 2
+    for line, w in lines:
+        draw.text(((512 - int(w)) // 2, y), line, fill=255, font=font)
+        y += 45
+
+    # Add watermark
+    draw.text((10, 484), "PaperBuddy", fill=255, font=small)
+    img.putpalette(_blend_palette(bg, fg))
+
+    # Convert to base64
+    buf = io.BytesIO()
+    img.save(buf, format='PNG')
+    return base64.b64encode(buf.getvalue()).decode()
+
+
+@lru_cache(maxsize=None)
+def _blend_palette(bg, fg):
+    """256-entry RGB palette stepping linearly from bg (index 0) to fg (255)."""
+    # Only a dozen (bg, fg) pairs exist, so each ramp is built once
+    b, f = ImageColor.getrgb(bg), ImageColor.getrgb(fg)
+    return bytes(b[c] + (f[c] - b[c]) * i // 255 for i in range(256) for c in range(3))
@@ -7,23 +7,179 @@ Falls back to mock data when API key is unavailable.
 """
 
 import os
-import json
+import copy
 import time
-from typing import Dict, List, Any, Optional
+import hashlib
+from typing import Dict, List, Any, Iterator, Optional
+
+import openai
+import orjson
+
+from cache import DEFAULT_CACHE_DIR, DiskCache, LRUCache
+from openai_client import get_client
+
+# Use GPT-4o for better JSON adherence. Part of the cache key, so switching
+# models never serves summaries written by the old one
+_SUMMARY_MODEL = "gpt-4o"
+
+# Required summary fields with the values used when the model omits them
+_SUMMARY_DEFAULTS = {
+    "big_idea": "This paper teaches computers to do something smart",
+    "steps": [
+        "Scientists had a problem to solve",
+        "They tried a new way to fix it",
+        "They tested if it works well"
+    ],
+    "example": "Like teaching a computer to recognize your pet",
+    "why_it_matters": "This helps make computers smarter and more helpful",
+    "limitations": "It doesn't work perfectly in all situations",
+    "glossary": [],
+    "for_class": {
+        "prerequisites": ["Basic understanding of the topic"],
+        "connections": ["Relates to other computer science concepts"],
+        "discussion_questions": ["How might this be used in real life?"]
+    },
+    "accuracy_flags": []
+}
+
+# Canned per-topic summaries returned when no API key is set or the LLM fails
+_MOCK_SUMMARIES = {
+    "CV": {
+        "big_idea": "Computers learn to see like humans do",
+        "steps": [
+            "Feed lots of pictures to computer",
+            "Computer finds patterns in pictures",
+            "Computer learns what things look like",
+            "Computer can now recognize new things"
+        ],
+        "example": "Like teaching a kid to recognize dogs by showing many dog photos",
+        "why_it_matters": "Helps self-driving cars see pedestrians and stop signs",
+        "limitations": "Gets confused by weird lighting or unusual angles",
+        "glossary": [
+            {"term": "Neural Network", "definition": "A computer brain made of many tiny helpers"},
+            {"term": "Training", "definition": "Teaching the computer by showing examples"},
+            {"term": "Dataset", "definition": "A big collection of pictures for learning"}
+        ],
+        "for_class": {
+            "prerequisites": ["Basic machine learning", "Linear algebra", "Python programming"],
+            "connections": ["Relates to CNNs", "Builds on deep learning", "Used in robotics"],
+            "discussion_questions": [
+                "How is this different from traditional computer vision?",
+                "What are the ethical implications of AI vision?",
+                "Where else could this technology be applied?"
+            ]
+        },
+        "accuracy_flags": [
+            "⚠️ This is MOCK data - OpenAI API key not configured",
+            "Set OPENAI_API_KEY in .env to get real summaries"
+        ]
+    },
+    "NLP": {
+        "big_idea": "Computers learn to understand human language",
+        "steps": [
+            "Computer reads lots of text and books",
+            "It learns how words go together",
+            "It understands what sentences mean",
+            "It can talk back in human language"
+        ],
+        "example": "Like a robot learning to chat by reading many conversations",
+        "why_it_matters": "Makes chatbots smarter and helps translate languages",
+        "limitations": "Sometimes misunderstands jokes or complex meanings",
+        "glossary": [
+            {"term": "Language Model", "definition": "A computer that learned to understand words"},
+            {"term": "Tokenization", "definition": "Breaking sentences into small pieces"},
+            {"term": "Embeddings", "definition": "Numbers that represent word meanings"}
+        ],
+        "for_class": {
+            "prerequisites": ["Basic NLP concepts", "Probability theory", "Python"],
+            "connections": ["Relates to transformers", "Used in chatbots", "Powers translation"],
+            "discussion_questions": [
+                "How do language models learn meaning?",
+                "What biases might exist in text data?",
+                "Can computers truly understand language?"
+            ]
+        },
+        "accuracy_flags": [
+            "⚠️ This is MOCK data - OpenAI API key not configured",
+            "Set OPENAI_API_KEY in .env to get real summaries"
+        ]
+    },
+    "Systems": {
+        "big_idea": "Making computers work faster and more efficiently",
+        "steps": [
+            "Find slow parts in the system",
+            "Design a clever way to speed up",
+            "Build and test the new system",
+            "Measure if it's actually faster"
+        ],
+        "example": "Like organizing your toys so you find them faster",
+        "why_it_matters": "Makes apps load quicker and saves electricity",
+        "limitations": "More speed often means more complexity",
+        "glossary": [
+            {"term": "Throughput", "definition": "How much work gets done per second"},
+            {"term": "Latency", "definition": "How long you wait for something to happen"},
+            {"term": "Scalability", "definition": "Ability to handle more work without breaking"}
+        ],
+        "for_class": {
+            "prerequisites": ["Operating systems", "Computer architecture", "Networks"],
+            "connections": ["Relates to distributed systems", "Used in cloud computing"],
+            "discussion_questions": [
+                "What trade-offs exist between speed and reliability?",
+                "How do we measure system performance?",
+                "What are the limits of optimization?"
+            ]
+        },
+        "accuracy_flags": [
+            "⚠️ This is MOCK data - OpenAI API key not configured",
+            "Set OPENAI_API_KEY in .env to get real summaries"
+        ]
+    }
+}
+
+# Course topic -> phrase used to frame the prompt
+_TOPIC_CONTEXTS = {
+    "CV": "computer vision and image understanding",
+    "NLP": "natural language processing and text understanding",
+    "Systems": "computer systems, networks, and infrastructure"
+}
+
+# Real (non-mock) summaries keyed by paper content + course topic, so the same
+# paper submitted twice for the same course skips the LLM call. The disk layer
+# keeps them across restarts and shares them between workers
+_SUMMARY_CACHE = LRUCache(maxsize=256, ttl=7 * 24 * 3600)
+_SUMMARY_DISK_CACHE = DiskCache(os.path.join(DEFAULT_CACHE_DIR, "summaries"), ttl=7 * 24 * 3600)
+
+
+def _cached_summary(key: str) -> Optional[Dict[str, Any]]:
+    """Look a summary up in memory, then on disk."""
+    summary = _SUMMARY_CACHE.get(key)
+    if summary is None:
+        summary = _SUMMARY_DISK_CACHE.get(key)
+        if summary is not None:
+            _SUMMARY_CACHE.set(key, summary)
+    return summary
+
+
+def _store_summary(key: str, summary: Dict[str, Any]) -> None:
+    """Remember a real LLM summary in both cache layers."""
+    _SUMMARY_CACHE.set(key, summary)
+    _SUMMARY_DISK_CACHE.set(key, summary)
 
 
 class LLMSummarizer:
     """Generates kid-friendly academic paper summaries using LLM."""
 
-    def __init__(self, backend="openai"):
+    def __init__(self, backend="openai", api_key=None):
         """
         Initialize LLM summarizer.
 
         Args:
             backend: "openai" or "mock"
+            api_key: OpenAI API key, read once by the caller (app.py passes
+                its import-time OPENAI_API_KEY); None means mock summaries
         """
         self.backend = backend
-        self.openai_key = os.getenv("OPENAI_API_KEY")
+        self.openai_key = api_key
         self.max_retries = 3
         self.timeout = 60  # seconds
 
@@ -50,7 +206,12 @@ class LLMSummarizer:
         """
         try:
             if self.backend == "openai" and self.openai_key:
-                return self._summarize_openai(title, authors, abstract, sections, course_topic)
+                key = self._cache_key(title, authors, abstract, sections, course_topic)
+                summary = _cached_summary(key)
+                if summary is None:
+                    summary = self._summarize_openai(title, authors, abstract, sections, course_topic)
+                    _store_summary(key, summary)
+                return summary
             else:
                 print("⚠️  No OpenAI API key found, returning mock summary")
                 return self._get_mock_summary(course_topic)
@@ -59,6 +220,97 @@ class LLMSummarizer:
             print("Falling back to mock summary")
             return self._get_mock_summary(course_topic)
 
+    def summarize_stream(
+        self,
+        title: str,
+        authors: List[str],
+        abstract: str,
+        sections: List[Dict[str, str]],
+        course_topic: str = "CV"
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a Like-I'm-Five summary while the LLM writes it.
+
+        Args:
+            Same as summarize()
+
+        Yields:
+            {"delta": str} chunks of raw JSON text as they arrive, then a final
+            {"summary": dict} holding the validated summary. Without an API key,
+            or if streaming fails, only the final (mock) summary is yielded.
+        """
+        if not (self.backend == "openai" and self.openai_key):
+            print("⚠️  No OpenAI API key found, returning mock summary")
+            yield {"summary": self._get_mock_summary(course_topic)}
+            return
+
+        parts = []
+
+        # No retries here: once deltas have been sent they can't be taken back.
+        # Key and prompt building sit inside the try too, so malformed input
+        # still ends the stream with a summary event, as summarize() does
+        try:
+            key = self._cache_key(title, authors, abstract, sections, course_topic)
+            cached = _cached_summary(key)
+            if cached is not None:
+                yield {"summary": cached}
+                return
+
+            prompt = self._build_prompt(title, authors, abstract, sections, course_topic)
+            stream = get_client(self.openai_key).chat.completions.create(
+                stream=True, **self._chat_kwargs(prompt)
+            )
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield {"delta": delta}
+
+            summary = self._validate_and_fix_summary(orjson.loads("".join(parts)))
+            _store_summary(key, summary)
+        except Exception as e:
+            print(f"LLM streaming failed: {e}")
+            print("Falling back to mock summary")
+            summary = self._get_mock_summary(course_topic)
+
+        yield {"summary": summary}
+
+    @staticmethod
+    def _cache_key(
+        title: str,
+        authors: List[str],
+        abstract: str,
+        sections: List[Dict[str, str]],
+        course_topic: str
+    ) -> str:
+        """Hash the summary inputs into a cache key."""
+        # Everything that reaches the prompt, serialized canonically
+        canonical = orjson.dumps(
+            [_SUMMARY_MODEL, title, authors, abstract, sections, course_topic],
+            option=orjson.OPT_SORT_KEYS,
+        )
+        return hashlib.sha256(canonical).hexdigest()
+
+    def _chat_kwargs(self, prompt: str) -> Dict[str, Any]:
+        """Build chat.completions.create() arguments for a summary prompt."""
+        return dict(
+            model=_SUMMARY_MODEL,
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are an expert teacher who explains complex academic papers in simple, kid-friendly language. Always respond with valid JSON."
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.7,
+            max_tokens=2000,
+            timeout=self.timeout
+        )
+
     def _summarize_openai(
         self,
         title: str,
@@ -68,35 +320,19 @@ class LLMSummarizer:
         course_topic: str
     ) -> Dict[str, Any]:
         """Generate summary using OpenAI GPT API."""
-        import openai
-
-        client = openai.OpenAI(api_key=self.openai_key)
+        client = get_client(self.openai_key)
         prompt = self._build_prompt(title, authors, abstract, sections, course_topic)
+        # Same request on every attempt, so build it once
+        request_kwargs = self._chat_kwargs(prompt)
 
         # Retry logic for API calls
         for attempt in range(self.max_retries):
             try:
-                response = client.chat.completions.create(
-                    model="gpt-4o",  # Use GPT-4o for better JSON adherence
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": "You are an expert teacher who explains complex academic papers in simple, kid-friendly language. Always respond with valid JSON."
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    response_format={"type": "json_object"},
-                    temperature=0.7,
-                    max_tokens=2000,
-                    timeout=self.timeout
-                )
+                response = client.chat.completions.create(**request_kwargs)
 
                 # Parse response
                 content = response.choices[0].message.content
-                summary = json.loads(content)
+                summary = orjson.loads(content)
 
                 # Validate required fields
                 summary = self._validate_and_fix_summary(summary)
@@ -117,7 +353,7 @@ class LLMSummarizer:
                 else:
                     raise
 
-            except json.JSONDecodeError as e:
+            except orjson.JSONDecodeError as e:
                 print(f"Failed to parse JSON response: {e}")
                 if attempt < self.max_retries - 1:
                     time.sleep(1)
@@ -153,12 +389,7 @@ class LLMSummarizer:
             ])
 
         # Topic-specific context
-        topic_contexts = {
-            "CV": "computer vision and image understanding",
-            "NLP": "natural language processing and text understanding",
-            "Systems": "computer systems, networks, and infrastructure"
-        }
-        topic_context = topic_contexts.get(course_topic, "computer science")
+        topic_context = _TOPIC_CONTEXTS.get(course_topic, "computer science")
 
         prompt = f"""You are a teacher explaining a research paper to 5-year-old kids. Be simple, clear, and fun!
 
@@ -219,43 +450,20 @@ Create a kid-friendly summary in JSON format. Use VERY simple words. Keep senten
     def _validate_and_fix_summary(self, summary: Dict[str, Any]) -> Dict[str, Any]:
         """Validate summary has all required fields and fix if needed."""
 
-        # Required fields with defaults
-        defaults = {
-            "big_idea": "This paper teaches computers to do something smart",
-            "steps": [
-                "Scientists had a problem to solve",
-                "They tried a new way to fix it",
-                "They tested if it works well"
-            ],
-            "example": "Like teaching a computer to recognize your pet",
-            "why_it_matters": "This helps make computers smarter and more helpful",
-            "limitations": "It doesn't work perfectly in all situations",
-            "glossary": [],
-            "for_class": {
-                "prerequisites": ["Basic understanding of the topic"],
-                "connections": ["Relates to other computer science concepts"],
-                "discussion_questions": ["How might this be used in real life?"]
-            },
-            "accuracy_flags": []
-        }
-
-        # Fill in missing fields
-        for key, default_value in defaults.items():
+        # Fill in missing fields. Defaults are copied so cached summaries never
+        # share mutable lists with the table or with each other
+        for key, default_value in _SUMMARY_DEFAULTS.items():
             if key not in summary or not summary[key]:
-                summary[key] = default_value
+                summary[key] = copy.deepcopy(default_value)
 
         # Validate nested for_class structure
-        if "for_class" in summary:
-            for_class = summary["for_class"]
-            if not isinstance(for_class, dict):
-                summary["for_class"] = defaults["for_class"]
-            else:
-                if "prerequisites" not in for_class:
-                    for_class["prerequisites"] = defaults["for_class"]["prerequisites"]
-                if "connections" not in for_class:
-                    for_class["connections"] = defaults["for_class"]["connections"]
-                if "discussion_questions" not in for_class:
-                    for_class["discussion_questions"] = defaults["for_class"]["discussion_questions"]
+        for_class = summary["for_class"]
+        if not isinstance(for_class, dict):
+            summary["for_class"] = copy.deepcopy(_SUMMARY_DEFAULTS["for_class"])
+        else:
+            for key, default_value in _SUMMARY_DEFAULTS["for_class"].items():
+                if key not in for_class:
+                    for_class[key] = list(default_value)
 
         # Ensure glossary is a list of dicts
         if not isinstance(summary.get("glossary"), list):
@@ -263,104 +471,12 @@ Create a kid-friendly summary in JSON format. Use VERY simple words. Keep senten
 
         # Ensure steps is a list
         if not isinstance(summary.get("steps"), list):
-            summary["steps"] = defaults["steps"]
+            summary["steps"] = list(_SUMMARY_DEFAULTS["steps"])
 
         return summary
 
     def _get_mock_summary(self, course_topic: str = "CV") -> Dict[str, Any]:
         """Return mock summary when API is unavailable."""
 
-        mock_summaries = {
-            "CV": {
-                "big_idea": "Computers learn to see like humans do",
-                "steps": [
-                    "Feed lots of pictures to computer",
-                    "Computer finds patterns in pictures",
-                    "Computer learns what things look like",
-                    "Computer can now recognize new things"
-                ],
-                "example": "Like teaching a kid to recognize dogs by showing many dog photos",
-                "why_it_matters": "Helps self-driving cars see pedestrians and stop signs",
-                "limitations": "Gets confused by weird lighting or unusual angles",
-                "glossary": [
-                    {"term": "Neural Network", "definition": "A computer brain made of many tiny helpers"},
-                    {"term": "Training", "definition": "Teaching the computer by showing examples"},
-                    {"term": "Dataset", "definition": "A big collection of pictures for learning"}
-                ],
-                "for_class": {
-                    "prerequisites": ["Basic machine learning", "Linear algebra", "Python programming"],
-                    "connections": ["Relates to CNNs", "Builds on deep learning", "Used in robotics"],
-                    "discussion_questions": [
-                        "How is this different from traditional computer vision?",
-                        "What are the ethical implications of AI vision?",
-                        "Where else could this technology be applied?"
-                    ]
-                },
-                "accuracy_flags": [
-                    "⚠️ This is MOCK data - OpenAI API key not configured",
-                    "Set OPENAI_API_KEY in .env to get real summaries"
-                ]
-            },
-            "NLP": {
-                "big_idea": "Computers learn to understand human language",
-                "steps": [
-                    "Computer reads lots of text and books",
-                    "It learns how words go together",
-                    "It understands what sentences mean",
-                    "It can talk back in human language"
-                ],
-                "example": "Like a robot learning to chat by reading many conversations",
-                "why_it_matters": "Makes chatbots smarter and helps translate languages",
-                "limitations": "Sometimes misunderstands jokes or complex meanings",
-                "glossary": [
-                    {"term": "Language Model", "definition": "A computer that learned to understand words"},
-                    {"term": "Tokenization", "definition": "Breaking sentences into small pieces"},
-                    {"term": "Embeddings", "definition": "Numbers that represent word meanings"}
-                ],
-                "for_class": {
-                    "prerequisites": ["Basic NLP concepts", "Probability theory", "Python"],
-                    "connections": ["Relates to transformers", "Used in chatbots", "Powers translation"],
-                    "discussion_questions": [
-                        "How do language models learn meaning?",
-                        "What biases might exist in text data?",
-                        "Can computers truly understand language?"
-                    ]
-                },
-                "accuracy_flags": [
-                    "⚠️ This is MOCK data - OpenAI API key not configured",
-                    "Set OPENAI_API_KEY in .env to get real summaries"
-                ]
-            },
-            "Systems": {
-                "big_idea": "Making computers work faster and more efficiently",
-                "steps": [
-                    "Find slow parts in the system",
-                    "Design a clever way to speed up",
-                    "Build and test the new system",
-                    "Measure if it's actually faster"
-                ],
-                "example": "Like organizing your toys so you find them faster",
-                "why_it_matters": "Makes apps load quicker and saves electricity",
-                "limitations": "More speed often means more complexity",
-                "glossary": [
-                    {"term": "Throughput", "definition": "How much work gets done per second"},
-                    {"term": "Latency", "definition": "How long you wait for something to happen"},
-                    {"term": "Scalability", "definition": "Ability to handle more work without breaking"}
-                ],
-                "for_class": {
-                    "prerequisites": ["Operating systems", "Computer architecture", "Networks"],
-                    "connections": ["Relates to distributed systems", "Used in cloud computing"],
-                    "discussion_questions": [
-                        "What trade-offs exist between speed and reliability?",
-                        "How do we measure system performance?",
-                        "What are the limits of optimization?"
-                    ]
-                },
-                "accuracy_flags": [
-                    "⚠️ This is MOCK data - OpenAI API key not configured",
-                    "Set OPENAI_API_KEY in .env to get real summaries"
-                ]
-            }
-        }
-
-        return mock_summaries.get(course_topic, mock_summaries["CV"])
+        # Deep copy so a caller editing the result can't alter the shared table
+        return copy.deepcopy(_MOCK_SUMMARIES.get(course_topic, _MOCK_SUMMARIES["CV"]))
@@ -0,0 +1,128 @@
+"""
+WSGI Middleware
+
+CORS is handled at the WSGI layer instead of through Flask-CORS. Preflight
+OPTIONS requests are answered before Flask routing runs, and every other
+response gets the same precomputed header appended.
+
+JSON responses are compressed with Brotli (or gzip, if the brotli package
+is missing or the client doesn't accept br) on the way out.
+"""
+
+import gzip
+
+try:
+    import brotli
+except ImportError:  # gzip-only without the optional brotli package
+    brotli = None
+
+
+class CORSMiddleware:
+    """Adds CORS headers and answers preflight requests without entering Flask."""
+
+    def __init__(self, app, origin="*"):
+        """
+        Wrap a WSGI application.
+
+        Args:
+            app: The wrapped WSGI callable (normally flask_app.wsgi_app)
+            origin: Value for Access-Control-Allow-Origin
+        """
+        self.app = app
+        self._headers = [("Access-Control-Allow-Origin", origin)]
+        self._preflight_headers = self._headers + [
+            ("Access-Control-Allow-Methods", "GET, POST, PUT, DELETE, OPTIONS"),
+            ("Access-Control-Allow-Headers", "Content-Type, Authorization"),
+            ("Access-Control-Max-Age", "86400"),
+            ("Content-Length", "0"),
+        ]
+
+    def __call__(self, environ, start_response):
+        if environ["REQUEST_METHOD"] == "OPTIONS":
+            start_response("204 No Content", list(self._preflight_headers))
+            return [b""]
+
+        def cors_start_response(status, headers, exc_info=None):
+            headers.extend(self._headers)
+            return start_response(status, headers, exc_info)
+
+        return self.app(environ, cors_start_response)
+
+
+class CompressionMiddleware:
+    """Compresses JSON responses according to the request's Accept-Encoding."""
+
+    def __init__(self, app, min_size=1024, brotli_quality=4):
+        """
+        Wrap a WSGI application.
+
+        Args:
+            app: The wrapped WSGI callable
+            min_size: Bodies smaller than this many bytes are sent as-is
+            brotli_quality: Brotli level; 4 is a good speed/ratio point for JSON
+        """
+        self.app = app
+        self.min_size = min_size
+        self.brotli_quality = brotli_quality
+
+    def __call__(self, environ, start_response):
+        encoding = self._pick_encoding(environ.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return self.app(environ, start_response)
+
+        captured = []
+
+        # Flask calls start_response before returning its body iterable, so the
+        # headers are known before anything has been sent
+        def capture_start_response(status, headers, exc_info=None):
+            captured[:] = [status, headers, exc_info]
+
+        app_iter = self.app(environ, capture_start_response)
+        status, headers, exc_info = captured
+
+        # Only buffer JSON; SSE streams and everything else pass straight through
+        content_type = next((v for k, v in headers if k.lower() == "content-type"), "")
+        already_encoded = any(k.lower() == "content-encoding" for k, _ in headers)
+        if not content_type.startswith("application/json") or already_encoded:
+            start_response(status, headers, exc_info)
+            return app_iter
+
+        try:
+            body = b"".join(app_iter)
+        finally:
+            if hasattr(app_iter, "close"):
+                app_iter.close()
+
+        headers = [(k, v) for k, v in headers if k.lower() != "content-length"]
+        headers.append(("Vary", "Accept-Encoding"))
+        if len(body) >= self.min_size:
+            if encoding == "br":
+                body = brotli.compress(body, quality=self.brotli_quality)
+            else:
+                body = gzip.compress(body, compresslevel=6)
+            headers.append(("Content-Encoding", encoding))
+        headers.append(("Content-Length", str(len(body))))
+
+        start_response(status, headers, exc_info)
+        return [body]
+
+    @staticmethod
+    def _pick_encoding(accept_encoding):
+        """Return "br", "gzip" or None for an Accept-Encoding header value."""
+        accepted = set()
+        for part in accept_encoding.lower().split(","):
+            name, _, params = part.partition(";")
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    if float(params[2:]) <= 0:
+                        continue
+                except ValueError:
+                    continue
+            accepted.add(name.strip())
+
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
@@ -0,0 +1,17 @@
+"""
+Shared OpenAI Client
+
+The summarizer and the image generator reuse one client per API key, so
+connections to api.openai.com stay alive across requests instead of paying
+a fresh TCP+TLS handshake on every call.
+"""
+
+from functools import lru_cache
+
+import openai
+
+
+@lru_cache(maxsize=4)
+def get_client(api_key):
+    """Return the process-wide OpenAI client for api_key, creating it once."""
+    return openai.OpenAI(api_key=api_key)
@@ -3,13 +3,101 @@ API Testing Script for PaperBuddy
 
 This script helps test each module's endpoint independently.
 Run: python test_api.py
+     python test_api.py --choice 0 [--base-url http://host:port]  (no prompt)
 """
 
+import argparse
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
-import json
+from requests.adapters import HTTPAdapter
+import orjson
 
 API_BASE_URL = "http://localhost:5175"
 
+# One keep-alive session for every test, so calls reuse pooled connections.
+# Concurrency comes from one pooled connection per in-flight test, not from
+# HTTP/1.1 pipelining: pipelined responses come back strictly in order, so one
+# slow summarize call would hold up the cheap requests queued behind it.
+# pool_maxsize stays above the number of tests "run all" starts at once
+SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+SESSION.mount("http://", _ADAPTER)
+SESSION.mount("https://", _ADAPTER)
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Fixed request payloads, encoded once at import
+_PARSE_MANUAL_DATA = {
+    "title": "Attention Is All You Need",
+    "authors": "Vaswani, Ashish, Shazeer, Noam",
+    "abstract": "The dominant sequence transduction models are based on complex recurrent or convolutional neural networks.",
+    "sections": [
+        {
+            "heading": "Introduction",
+            "content": "Recurrent neural networks have been the dominant approach..."
+        },
+        {
+            "heading": "Model Architecture",
+            "content": "Most competitive neural sequence transduction models..."
+        }
+    ],
+    "courseTopic": "NLP"
+}
+_PARSE_MANUAL_BODY = orjson.dumps(_PARSE_MANUAL_DATA)
+_NULL_SECTIONS_BODY = orjson.dumps({**_PARSE_MANUAL_DATA, "sections": None})
+
+_SUMMARIZE_DATA = {
+    "title": "Attention Is All You Need",
+    "authors": ["Vaswani", "Shazeer"],
+    "abstract": "The dominant sequence transduction models are based on complex recurrent or convolutional neural networks that include an encoder and decoder.",
+    "sections": [
+        {
+            "heading": "Introduction",
+            "content": "Recurrent models factor computation along positions..."
+        }
+    ],
+    "courseTopic": "NLP"
+}
+_SUMMARIZE_BODY = orjson.dumps(_SUMMARIZE_DATA)
+_NO_HEADING_STREAM_BODY = orjson.dumps({**_SUMMARIZE_DATA, "sections": [{"content": "no heading"}]})
+
+_IMAGE_DATA = {
+    "key_points": [
+        "Neural networks learn patterns",
+        "Training requires lots of data",
+        "Models make predictions"
+    ],
+    "style": "pastel"
+}
+_IMAGE_BODY = orjson.dumps(_IMAGE_DATA)
+
+_PIPELINE_MANUAL_DATA = {
+    "title": "Test Paper",
+    "authors": "Alice, Bob",
+    "abstract": "This is a test abstract for pipeline testing, long enough to pass validation.",
+    "sections": [],
+    "courseTopic": "CV"
+}
+_PIPELINE_MANUAL_BODY = orjson.dumps(_PIPELINE_MANUAL_DATA)
+_PIPELINE_BODY = orjson.dumps({"manual": _PIPELINE_MANUAL_DATA, "style": "pastel"})
+
+def _parse(response):
+    """Decode a JSON response body"""
+    return orjson.loads(response.content)
+
+def _post_json(url, obj):
+    """POST obj as a JSON body, encoded with orjson rather than requests' json=.
+    Bytes are taken as an already-encoded body"""
+    body = obj if isinstance(obj, bytes) else orjson.dumps(obj)
+    return SESSION.post(url, data=body, headers=_JSON_HEADERS)
+
+def _pp(obj):
+    """Pretty-print a decoded JSON value"""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
 def print_section(title):
     print("\n" + "=" * 60)
     print(f"  {title}")
@@ -18,45 +106,43 @@ def print_section(title):
 def test_health():
     """Test health check endpoint"""
     print_section("Testing Health Check")
-    response = requests.get(f"{API_BASE_URL}/api/health")
+    response = SESSION.get(f"{API_BASE_URL}/api/health")
     print(f"Status: {response.status_code}")
-    print(f"Response: {json.dumps(response.json(), indent=2)}")
+    print(f"Response: {_pp(_parse(response))}")
 
 def test_info():
     """Test API info endpoint"""
     print_section("Testing API Info")
-    response = requests.get(f"{API_BASE_URL}/api/info")
+    response = SESSION.get(f"{API_BASE_URL}/api/info")
     print(f"Status: {response.status_code}")
-    print(f"Response: {json.dumps(response.json(), indent=2)}")
+    print(f"Response: {_pp(_parse(response))}")
 
 def test_parse_manual():
     """Test Module A - Manual Input Parsing"""
     print_section("Testing Module A: Manual Input Parsing")
 
-    test_data = {
-        "title": "Attention Is All You Need",
-        "authors": "Vaswani, Ashish, Shazeer, Noam",
-        "abstract": "The dominant sequence transduction models are based on complex recurrent or convolutional neural networks.",
-        "sections": [
-            {
-                "heading": "Introduction",
-                "content": "Recurrent neural networks have been the dominant approach..."
-            },
-            {
-                "heading": "Model Architecture",
-                "content": "Most competitive neural sequence transduction models..."
-            }
-        ],
-        "courseTopic": "NLP"
-    }
-
-    response = requests.post(
+    response = _post_json(
+        f"{API_BASE_URL}/api/parse/manual",
+        _PARSE_MANUAL_BODY
+    )
+
+    print(f"Status: {response.status_code}")
+    print(f"Response: {_pp(_parse(response))}")
+
+def test_parse_manual_null_sections():
+    """Test Module A - Manual input with "sections": null is treated as empty"""
+    print_section("Testing Module A: Manual Input with Null Sections")
+
+    response = _post_json(
         f"{API_BASE_URL}/api/parse/manual",
-        json=test_data
+        _NULL_SECTIONS_BODY
     )
 
     print(f"Status: {response.status_code}")
-    print(f"Response: {json.dumps(response.json(), indent=2)}")
+    result = _parse(response)
+    assert response.status_code == 200, f"expected 200, got {response.status_code}: {result}"
+    assert result["sections"] == [], f"expected no sections, got {result['sections']}"
+    print("✓ Null sections accepted as an empty list")
 
 def test_parse_pdf():
     """Test Module A - PDF Parsing"""
@@ -68,14 +154,14 @@ def test_parse_pdf():
             files = {"file": f}
             data = {"courseTopic": "CV"}
 
-            response = requests.post(
+            response = SESSION.post(
                 f"{API_BASE_URL}/api/parse/pdf",
                 files=files,
                 data=data
             )
 
             print(f"Status: {response.status_code}")
-            print(f"Response: {json.dumps(response.json(), indent=2)}")
+            print(f"Response: {_pp(_parse(response))}")
     except FileNotFoundError:
         print("⚠️  test.pdf not found. Skipping PDF test.")
         print("   Create a test.pdf file to test this endpoint.")
@@ -84,47 +170,47 @@ def test_summarize():
     """Test Module B - LLM Summarization"""
     print_section("Testing Module B: LLM Summarization")
 
-    paper_data = {
-        "title": "Attention Is All You Need",
-        "authors": ["Vaswani", "Shazeer"],
-        "abstract": "The dominant sequence transduction models are based on complex recurrent or convolutional neural networks that include an encoder and decoder.",
-        "sections": [
-            {
-                "heading": "Introduction",
-                "content": "Recurrent models factor computation along positions..."
-            }
-        ],
-        "courseTopic": "NLP"
-    }
-
-    response = requests.post(
+    response = _post_json(
         f"{API_BASE_URL}/api/summarize",
-        json=paper_data
+        _SUMMARIZE_BODY
     )
 
     print(f"Status: {response.status_code}")
-    print(f"Response: {json.dumps(response.json(), indent=2)}")
+    print(f"Response: {_pp(_parse(response))}")
+
+def test_summarize_stream_no_heading():
+    """Test Module B - A section without a heading still ends the stream with a summary"""
+    print_section("Testing Module B: Streamed Summary, Section Without Heading")
+
+    with SESSION.post(
+        f"{API_BASE_URL}/api/summarize/stream",
+        data=_NO_HEADING_STREAM_BODY,
+        headers=_JSON_HEADERS,
+        stream=True
+    ) as response:
+        print(f"Status: {response.status_code}")
+        assert response.status_code == 200, f"expected 200, got {response.status_code}"
+        events = [
+            orjson.loads(line[len(b"data: "):])
+            for line in response.iter_lines()
+            if line.startswith(b"data: ")
+        ]
+
+    assert events, "stream ended without any events"
+    assert "summary" in events[-1], f"last event has no summary: {events[-1]}"
+    print(f"✓ {len(events)} event(s), last one carries the summary")
 
 def test_generate_images():
     """Test Module C - Image Generation"""
     print_section("Testing Module C: Image Generation")
 
-    image_data = {
-        "key_points": [
-            "Neural networks learn patterns",
-            "Training requires lots of data",
-            "Models make predictions"
-        ],
-        "style": "pastel"
-    }
-
-    response = requests.post(
+    response = _post_json(
         f"{API_BASE_URL}/api/images/generate",
-        json=image_data
+        _IMAGE_BODY
     )
 
     print(f"Status: {response.status_code}")
-    result = response.json()
+    result = _parse(response)
 
     # Pretty print without full image URLs (they're long)
     if "images" in result:
@@ -135,63 +221,81 @@ def test_generate_images():
             print(f"    Description: {img.get('description')}")
             print(f"    URL: {img.get('url')[:50]}..." if len(img.get('url', '')) > 50 else img.get('url'))
     else:
-        print(f"Response: {json.dumps(result, indent=2)}")
+        print(f"Response: {_pp(result)}")
 
 def test_full_pipeline():
-    """Test full pipeline integration"""
+    """Test full pipeline integration in one /api/pipeline round trip"""
     print_section("Testing Full Pipeline (Manual Input)")
 
+    print("Running parse -> summarize -> images on the server...")
+    response = _post_json(f"{API_BASE_URL}/api/pipeline", _PIPELINE_BODY)
+    result = _parse(response)
+
+    assert response.status_code == 200, \
+        f"pipeline failed at {result.get('step', 'request')}: {result.get('error')}"
+    for key in ("parse", "summary", "images"):
+        assert key in result, f"response is missing '{key}'"
+
+    paper_data, summary, images = result["parse"], result["summary"], result["images"]
+    assert summary.get("big_idea") and summary.get("steps"), f"incomplete summary: {summary}"
+    assert images.get("images") and images.get("backend"), f"no images returned: {images}"
+    print("✓ Parse, summary and images returned")
+
+    print("\n" + "-" * 60)
+    print("Pipeline completed successfully!")
+    print(f"Paper: {paper_data.get('title')}")
+    print(f"Big Idea: {summary.get('big_idea')}")
+    print(f"Images: {len(images.get('images', []))} generated")
+    print("-" * 60)
+
+def test_full_pipeline_legacy():
+    """Test full pipeline integration as three client-side calls"""
+    print_section("Testing Full Pipeline (Manual Input, 3 calls)")
+
     # Step 1: Parse manual input
     print("Step 1: Parsing manual input...")
-    manual_data = {
-        "title": "Test Paper",
-        "authors": "Alice, Bob",
-        "abstract": "This is a test abstract for pipeline testing.",
-        "sections": [],
-        "courseTopic": "CV"
-    }
-
-    parse_response = requests.post(
+
+    parse_response = _post_json(
         f"{API_BASE_URL}/api/parse/manual",
-        json=manual_data
+        _PIPELINE_MANUAL_BODY
     )
 
     if parse_response.status_code != 200:
-        print(f"❌ Parse failed: {parse_response.json()}")
+        print(f"❌ Parse failed: {_parse(parse_response)}")
         return
 
-    paper_data = parse_response.json()
+    paper_data = _parse(parse_response)
     print("✓ Parse successful")
 
     # Step 2: Summarize
     print("\nStep 2: Generating summary...")
-    summary_response = requests.post(
+    summary_response = _post_json(
         f"{API_BASE_URL}/api/summarize",
-        json=paper_data
+        paper_data
     )
 
     if summary_response.status_code != 200:
-        print(f"❌ Summarize failed: {summary_response.json()}")
+        print(f"❌ Summarize failed: {_parse(summary_response)}")
         return
 
-    summary = summary_response.json()
+    summary = _parse(summary_response)
     print("✓ Summary generated")
 
     # Step 3: Generate images
     print("\nStep 3: Generating images...")
-    images_response = requests.post(
+    images_response = _post_json(
         f"{API_BASE_URL}/api/images/generate",
-        json={
+        {
             "key_points": summary.get("steps", ["test point"]),
             "style": "pastel"
         }
     )
 
     if images_response.status_code != 200:
-        print(f"❌ Image generation failed: {images_response.json()}")
+        print(f"❌ Image generation failed: {_parse(images_response)}")
         return
 
-    images = images_response.json()
+    images = _parse(images_response)
     print("✓ Images generated")
 
     # Final result
@@ -202,8 +306,81 @@ def test_full_pipeline():
     print(f"Images: {len(images.get('images', []))} generated")
     print("-" * 60)
 
+class _ThreadLocalStdout:
+    """stdout stand-in that sends each thread's prints to its own buffer, if set"""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    def capture(self, buf):
+        self._local.buf = buf
+
+    def write(self, text):
+        return (getattr(self._local, "buf", None) or self._stream).write(text)
+
+    def flush(self):
+        self._stream.flush()
+
+def _run_captured(stdout, test_func):
+    """Run one test on a worker thread, returning (printed output, exception or None)"""
+    buf = io.StringIO()
+    stdout.capture(buf)
+    try:
+        test_func()
+        return buf.getvalue(), None
+    except Exception as e:
+        return buf.getvalue(), e
+    finally:
+        stdout.capture(None)
+
+def run_all(tests):
+    """Run the independent tests concurrently, then the pipeline that depends on the server state"""
+    independent, (_, pipeline) = tests[:-1], tests[-1]
+
+    # Output is buffered per test and replayed in menu order, so it reads
+    # the same as a sequential run
+    stdout = _ThreadLocalStdout(sys.stdout)
+    sys.stdout = stdout
+    try:
+        with ThreadPoolExecutor(max_workers=len(independent)) as pool:
+            results = list(pool.map(_run_captured, [stdout] * len(independent), [f for _, f in independent]))
+    finally:
+        sys.stdout = stdout._stream
+
+    connection_failed = False
+    for output, error in results:
+        print(output, end="")
+        if isinstance(error, requests.exceptions.ConnectionError):
+            connection_failed = True
+        elif error is not None:
+            print(f"❌ Test failed: {str(error)}")
+
+    if connection_failed:
+        print(f"❌ Connection failed. Is the server running on {API_BASE_URL}?")
+        return
+
+    try:
+        pipeline()
+    except requests.exceptions.ConnectionError:
+        print(f"❌ Connection failed. Is the server running on {API_BASE_URL}?")
+    except Exception as e:
+        print(f"❌ Test failed: {str(e)}")
+
 def main():
     """Run all tests"""
+    global API_BASE_URL
+
+    parser = argparse.ArgumentParser(description="PaperBuddy API tests")
+    parser.add_argument("--choice", type=int, default=None,
+                        help="test to run (0 = all); skips the interactive prompt")
+    parser.add_argument("--base-url", default=API_BASE_URL,
+                        help=f"server to test (default: {API_BASE_URL})")
+    parser.add_argument("--legacy-pipeline", action="store_true",
+                        help="run the pipeline test as separate parse/summarize/images calls")
+    args = parser.parse_args()
+    API_BASE_URL = args.base_url.rstrip("/")
+
     print("\n" + "🧪" * 30)
     print("PaperBuddy API Testing Suite")
     print("🧪" * 30)
@@ -215,7 +392,9 @@ def main():
         ("Module A: PDF Parsing", test_parse_pdf),
         ("Module B: Summarization", test_summarize),
         ("Module C: Image Generation", test_generate_images),
-        ("Full Pipeline", test_full_pipeline)
+        ("Module A: Null Sections", test_parse_manual_null_sections),
+        ("Module B: Stream Without Heading", test_summarize_stream_no_heading),
+        ("Full Pipeline", test_full_pipeline_legacy if args.legacy_pipeline else test_full_pipeline)
     ]
 
     print("\nSelect a test to run:")
@@ -223,32 +402,29 @@ def main():
     for i, (name, _) in enumerate(tests, 1):
         print(f"{i}. {name}")
 
-    choice = input("\nEnter your choice (0-7): ").strip()
-
-    try:
-        choice = int(choice)
-        if choice == 0:
-            # Run all tests
-            for name, test_func in tests:
+    with SESSION:
+        if args.choice is not None:
+            choice = args.choice
+        else:
+            choice = input(f"\nEnter your choice (0-{len(tests)}): ").strip()
+
+        try:
+            choice = int(choice)
+            if choice == 0:
+                # Run all tests
+                run_all(tests)
+            elif 1 <= choice <= len(tests):
+                name, test_func = tests[choice - 1]
                 try:
                     test_func()
                 except requests.exceptions.ConnectionError:
                     print(f"❌ Connection failed. Is the server running on {API_BASE_URL}?")
-                    break
                 except Exception as e:
                     print(f"❌ Test failed: {str(e)}")
-        elif 1 <= choice <= len(tests):
-            name, test_func = tests[choice - 1]
-            try:
-                test_func()
-            except requests.exceptions.ConnectionError:
-                print(f"❌ Connection failed. Is the server running on {API_BASE_URL}?")
-            except Exception as e:
-                print(f"❌ Test failed: {str(e)}")
-        else:
-            print("Invalid choice")
-    except ValueError:
-        print("Invalid input")
+            else:
+                print("Invalid choice")
+        except ValueError:
+            print("Invalid input")
 
     print("\n" + "✅" * 30)
     print("Testing complete!")
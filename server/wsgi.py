@@ -0,0 +1,18 @@
+"""
+WSGI entry point for production serving.
+
+Gunicorn runs the app on gevent workers so the blocking OpenAI/arXiv calls
+in summarize and generate_images yield to other requests instead of pinning
+a worker for the whole round-trip:
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+"""
+
+from gevent import monkey
+
+# Must run before requests/openai/pypdfium2 are imported so their sockets cooperate
+monkey.patch_all()
+
+from app import app  # noqa: E402
+
+application = app